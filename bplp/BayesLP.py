@@ -10,14 +10,39 @@ class BayesLP:
         self.n_grid = 10
         self.interval = [0, 1]
 
+        # The functions below are evaluated on numpy arrays of states and
+        # messages (a column of states against a row of messages), so they
+        # should be written with broadcasting numpy operations.
+
         # Receiver's utility function
         self.receiver_util = lambda s, r: s - r
 
         # Receiver's private information distribution
         self.private_info = lambda s, r: 1
 
-        # Sender's utility function
+        # Sender's utility function. May also be an (n_grid x n_grid) array of
+        # utilities already evaluated on (state, message) pairs of the grid.
         self.sender_util = lambda s, m: m**2
 
         # Prior distribution
-        self.prior = lambda s: norm.pdf(s)
+        self.prior = norm.pdf
+
+        # Grid of the last call to grid, recomputed when n_grid or interval change
+        self._grid_cache = None
+
+        # Transportation matrix of the last solve, reused by the solver while
+        # the grid and the receiver's utility are unchanged
+        self._transport_cache = None
+
+    @property
+    def grid(self):
+        """
+        The grid of n_grid evenly spaced points on interval, shared by the
+        state and message spaces. Cached until n_grid or interval change.
+        """
+        key = (self.n_grid, tuple(self.interval))
+        if self._grid_cache is None or self._grid_cache[0] != key:
+            grid = np.linspace(self.interval[0], self.interval[1], self.n_grid)
+            self._grid_cache = (key, grid)
+
+        return self._grid_cache[1]
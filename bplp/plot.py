@@ -23,7 +23,7 @@ def plot_primal_joint_marginal(solved_program, dir, title = ''):
     # Set up grid for the state and message spaces
     n        = solved_program["n_grid"]
     interval = solved_program["interval"]
-    grid     = np.linspace(interval[0], interval[1], n)
+    grid     = solved_program["grid"]
 
     # Dimensions from the primal solution
     na, nb = solved_program["mechanism"].shape
@@ -44,9 +44,9 @@ def plot_primal_joint_marginal(solved_program, dir, title = ''):
     # Plot heatmap of the primal mechanism
     ax3 = pl.subplot(gs[1:, 1:])
 
-    # set ticks:
-    ticks    = [i for i in range(0, n, int(0.2 * n))]
-    tick_lab = [round((1/n) * i,1) for i in range(0, n, int(0.2 * n))]
+    # set ticks: about five per axis, labelled with the grid values
+    ticks    = np.arange(0, n, max(1, n // 5))
+    tick_lab = np.round(grid[ticks], 1)
 
     ax3.set_xticks(ticks)
     ax3.set_xticklabels(tick_lab)
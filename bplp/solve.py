@@ -1,6 +1,64 @@
 # primal methods
 import numpy as np
 import scipy.optimize as opt
+import scipy.sparse as sp
+
+def _transport_matrix(program, S, R):
+    """
+    Builds the (2n x n^2) transportation matrix of the primal program, or
+    returns the copy cached on program if it was built for the same grid,
+    receiver's utility and private information.
+    INPUT
+        program (BayesLP) class instance that contains parameters of the
+            problem (e.g. receiver and sender utility functions).
+        S (n x 1 array) the grid of states, as a column.
+        R (1 x n array) the grid of messages, as a row.
+    RETURNS
+        transport (2n x n^2 sparse matrix) the projections on the state space
+            and the message space, in CSC format.
+    """
+
+    n = program.n_grid
+
+    # The functions are compared by identity, so reassigning one of them
+    # (even to an equivalent lambda) rebuilds the matrix.
+    key = (n, tuple(program.interval),
+           program.receiver_util, program.private_info)
+    if program._transport_cache is not None and program._transport_cache[0] == key:
+        return program._transport_cache[1]
+
+    # The "transportation" matrix, which defines the projections
+    # on the state space and the message space. It has at most two nonzeros
+    # per column, so it is stored as a sparse matrix.
+
+    # The columns of the transpose of the A matrix correspond
+    # with the sender's expected utility from the posterior generated by the
+    # mechanism, and the sender's private information (averaged over all states).
+    # This is made to equal 0 in the program (this is the IC constraint,
+    # the sender has an expected utility of 0).
+    postr_utility = np.broadcast_to(
+        program.receiver_util(S, R) * program.private_info(S, R), (n, n))
+
+    # Viewing the n^2 decision variables as an (n x n) grid, column i*n + j
+    # has exactly two nonzeros: a 1 in row i (the projection on state space)
+    # and the receiver's utility in row n + j (the projection on message
+    # space). Fill the CSC arrays in place through (n x n x 2) views, so the
+    # stores broadcast without any n^2 sized temporaries.
+    data    = np.empty(2 * n**2)
+    indices = np.empty(2 * n**2, dtype = np.int64)
+    data_grid    = data.reshape((n, n, 2))
+    indices_grid = indices.reshape((n, n, 2))
+    data_grid[:, :, 0]    = 1.
+    data_grid[:, :, 1]    = postr_utility
+    indices_grid[:, :, 0] = np.arange(n)[:, None]
+    indices_grid[:, :, 1] = n + np.arange(n)[None, :]
+    indptr = np.arange(0, 2 * n**2 + 1, 2)
+
+    transport = sp.csc_matrix((data, indices, indptr), shape = (2 * n, n**2))
+
+    program._transport_cache = (key, transport)
+
+    return transport
 
 def bayes_lp_solver(program):
     """
@@ -9,11 +67,15 @@ def bayes_lp_solver(program):
     to the receiver's incentive compability constraint on the message space.
     INPUT
         program (BayesLP) class instance that contains parameters of the
-            problem (e.g. receiver and sender utility functions).
+            problem (e.g. receiver and sender utility functions). The
+            functions are called once on the whole grid, so they must
+            accept numpy arrays.
     RETURNS
         solve (dict) contains the parameters, constraint realizations, and
         solutions of the Bayes LP problem.
             program (dict) the parameters of the program
+            transport (2n x n^2 sparse matrix) the constraint matrix shared by
+                the primal and the dual programs.
             prior_constraint (n x 1 array) the prior density evaluated on states.
             ic_constraint (n x 1 array) an array of 0s indicating the receiver's
                 expected utility in each state
@@ -26,26 +88,24 @@ def bayes_lp_solver(program):
     """
 
     # Load program parameters.
-    # Set up the grid.
     n = program.n_grid
     interval = program.interval
-    grid = np.linspace(interval[0], interval[1], n)
+    grid = program.grid
 
-    # Vectorize functions
-    prior_vec         = np.vectorize(program.prior)
-    sender_util_vec   = np.vectorize(program.sender_util)
-    private_info_vec  = np.vectorize(program.private_info)
-    receiver_util_vec = np.vectorize(program.receiver_util)
+    # Views of the grid as a column (states) and a row (messages), so that
+    # the program functions broadcast to (n x n) arrays in a single call.
+    S = grid[:, None]
+    R = grid[None, :]
 
     ## Constraints
 
     # Bayes-plausibility constraint
 
     # This is the prior distribution evaluated on the vector of states
-    prior = prior_vec(grid)
+    prior = np.empty(n)
+    prior[:] = program.prior(grid)
     # Normalize prior distribution
-    if sum(prior) != 1.:
-        prior = np.divide(prior, sum(prior))
+    prior /= prior.sum()
 
     # Incentive compatibility constraint
     ic_constraint = np.zeros(n)
@@ -54,70 +114,55 @@ def bayes_lp_solver(program):
 
     # Create a matrix of sender's utilities for different
     # (state, message) combinations.
-    V_mat = np.ndarray(shape = (n,n))
-    for j in range(n):
-        V_mat[:,j] = sender_util_vec(grid,grid[j])
-    # Reshape to an n^2 array, the cost vector in the LP
-    V = V_mat.reshape((n**2))
-    # negative, so that linprog will return a maximum
-    V = -V
+    # The sender's utility may also be given as a precomputed array.
+    V_mat = np.empty((n, n))
+    if callable(program.sender_util):
+        V_mat[:] = program.sender_util(S, R)
+    else:
+        V_mat[:] = program.sender_util
+    # The cost vector in the LP is the flattened matrix, negative so that
+    # linprog will return a maximum. Negating allocates a contiguous array,
+    # so ravel returns a view of it.
+    V = (-V_mat).ravel()
 
     ## Transportation matrix
 
-    # The "transportation" matrix, which defines the projections
-    # on the state space and the message space.
-    ones = np.ones(n)
-    ones_T = ones.reshape((n,1))
-
-    # The rows of the transpose of the transportation matrix correspond
-    # with the projection on state space.
-    state_space_proj = np.kron(np.eye(n), ones_T)
-
-    # The columns of the transpose of the A matrix correspond
-    # with the sender's expected utility from the posterior generated by the
-    # mechanism, and the sender's private information (averaged over all states).
-    # This is made to equal 0 in the program (this is the IC constraint,
-    # the sender has an expected utility of 0).
-    ic_message_proj = []
-    for i in range(n):
-        postr_utility = receiver_util_vec(grid[i], grid) * private_info_vec(grid[i], grid)
-        postr_utility_mat = np.diag(postr_utility)
-
-        if i == 0:
-            ic_message_proj = postr_utility_mat
-        else:
-            ic_message_proj = np.vstack((ic_message_proj, postr_utility_mat))
-
-    # Stack the state space projection and the column space projection
-    # horizontally. Then take the transpose.
-    transport_T = np.hstack((state_space_proj, ic_message_proj))
-    transport   = transport_T.T
+    # Reused across solves as long as the grid and the receiver's
+    # utility are unchanged.
+    transport = _transport_matrix(program, S, R)
 
     ## Solve
 
     # Solve with linprog
-    bp_primal = opt.linprog(V, A_eq = transport, b_eq = b)
-    bp_dual   = opt.linprog(b, A_eq = transport_T, b_eq = V)
+    bp_primal = opt.linprog(V, A_eq = transport, b_eq = b, bounds = (0, None),
+                            method = 'highs-ds')
+    # The dual of the sender's maximization: minimize b.y subject to
+    # transport^T y >= -V, with y unrestricted in sign. It is solved in
+    # z = -y, so the transportation matrix of the primal is reused as is
+    # rather than copied with its sign flipped.
+    bp_dual   = opt.linprog(-b, A_ub = transport.T, b_ub = V, bounds = (None, None),
+                            method = 'highs-ds')
 
     # The primal solution, which is a joint probability distribution
     mechanism = bp_primal.x.reshape((n,n))
 
     # The dual solutions, which are functions over the state space
     # and the message space
-    dual_state = bp_dual.x[:n]
-    dual_message = bp_dual.x[n:]
+    dual = -bp_dual.x
+    dual_state = dual[:n]
+    dual_message = dual[n:]
 
     # Normalize (although this should not be necessary), since the prior
     # distribution is normalized to 1.
-    # mechanism = np.divide(mechanism, mechanism.sum())
+    # mechanism /= mechanism.sum()
 
-    value_matrix = -V
-    value_matrix = value_matrix.reshape((n, n))
+    value_matrix = V_mat
 
     # Save parameters of the problem
     params = {"n_grid": n,
               "interval": interval,
               "grid": grid,
+              "transport": transport,
               "value_mat": value_matrix,
               "prior_constraint": prior,
               "ic_constraint": ic_constraint}